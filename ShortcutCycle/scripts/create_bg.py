@@ -1,4 +1,28 @@
-from PIL import Image, ImageDraw
+# Generates scripts/dmg_background.png, the installer window background used
+# by scripts/generate_dmg.sh. Run from the ShortcutCycle/ directory:
+#
+#   python3 scripts/create_bg.py
+#
+# Requires Pillow and NumPy (pip3 install Pillow numpy).
+
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+
+@lru_cache(maxsize=1)
+def _arrow_head(head_size):
+    # Right-pointing triangle mask, tip at the middle of the right edge.
+    # A pixel is inside when it lies on the same side of all three edges
+    # (cross product sign test).
+    half = head_size // 2
+    triangle = [(head_size, half), (0, 0), (0, 2 * half)]
+    ys, xs = np.mgrid[0:2 * half + 1, 0:head_size + 1]
+    mask = np.ones(xs.shape, dtype=bool)
+    for (x0, y0), (x1, y1) in zip(triangle, triangle[1:] + triangle[:1]):
+        mask &= (x1 - x0) * (ys - y0) - (y1 - y0) * (xs - x0) <= 0
+    mask.flags.writeable = False
+    return mask
 
 def create_dmg_background(output_path):
     width = 650
@@ -6,8 +30,7 @@ def create_dmg_background(output_path):
     background_color = (255, 255, 255)  # White
     arrow_color = (200, 200, 200)       # Light gray
 
-    image = Image.new("RGB", (width, height), background_color)
-    draw = ImageDraw.Draw(image)
+    pixels = np.full((height, width, 3), background_color, dtype=np.uint8)
 
     # Coordinates
     app_icon_pos = (175, 120)
@@ -22,18 +45,21 @@ def create_dmg_background(output_path):
     arrow_end_tip = (app_folder_pos[0] - 70, app_folder_pos[1])
     arrow_line_end = (arrow_end_tip[0] - head_size, arrow_end_tip[1])
     
-    # Draw arrow line (stem)
-    draw.line([arrow_start, arrow_line_end], fill=arrow_color, width=arrow_width)
+    # Draw arrow line (stem) as an axis-aligned rectangle
+    stem_top = arrow_start[1] - (arrow_width - 1) // 2
+    pixels[stem_top:stem_top + arrow_width, arrow_start[0]:arrow_line_end[0] + 1] = arrow_color
     
     # Draw arrow head
-    draw.polygon([
-        (arrow_end_tip[0], arrow_end_tip[1]),
-        (arrow_end_tip[0] - head_size, arrow_end_tip[1] - head_size // 2),
-        (arrow_end_tip[0] - head_size, arrow_end_tip[1] + head_size // 2)
-    ], fill=arrow_color)
+    head = _arrow_head(head_size)
+    head_top = arrow_end_tip[1] - head_size // 2
+    head_left = arrow_end_tip[0] - head_size
+    pixels[head_top:head_top + head.shape[0], head_left:head_left + head.shape[1]][head] = arrow_color
+
+    # Only two colors are used, so an 8-bit palette image is lossless
+    image = Image.fromarray(pixels).convert("P", palette=Image.Palette.ADAPTIVE, colors=2)
 
     # Save
-    image.save(output_path)
+    image.save(output_path, optimize=True, compress_level=9)
     print(f"Generated {output_path}")
 
 if __name__ == "__main__":
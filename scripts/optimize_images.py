@@ -1,18 +1,46 @@
 #!/usr/bin/env python3
+import io
 import os
+import shutil
+import subprocess
 import sys
-from PIL import Image
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
+from pathlib import Path
+
+# Check for Pillow
+try:
+    import PIL
+    from PIL import Image, features
+except ImportError:
+    print("❌ Error: 'Pillow' library is not installed.")
+    print("Please install it running: pip3 install Pillow")
+    sys.exit(1)
+
+# Optional: OpenCV's SIMD area resize beats Pillow's LANCZOS for downscaling
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
+
+# Optional: libvips fuses decode and resize with shrink-on-load
+try:
+    import pyvips
+except (ImportError, OSError):
+    pyvips = None
 
 # Configuration
 # Paths are relative to the project root (where this script is expected to be run from)
-PROJECT_ROOT = os.getcwd()
+PROJECT_ROOT = Path.cwd()
 
 # Source Directories
-SCREENSHOTS_DIR = os.path.join(PROJECT_ROOT, "ShortcutCycle/App Store Connect Assets/Screenshots")
-ICON_PATH = os.path.join(PROJECT_ROOT, "ShortcutCycle/ShortcutCycle/Assets.xcassets/AppIcon.appiconset/1024.png")
+SCREENSHOTS_DIR = PROJECT_ROOT / "ShortcutCycle/App Store Connect Assets/Screenshots"
+ICON_PATH = PROJECT_ROOT / "ShortcutCycle/ShortcutCycle/Assets.xcassets/AppIcon.appiconset/1024.png"
 
 # Output Directory
-OUTPUT_DIR = os.path.join(PROJECT_ROOT, "docs/assets/images")
+OUTPUT_DIR = PROJECT_ROOT / "docs/assets/images"
 
 # Map source filename to output filename (without extension)
 FILES_TO_PROCESS = {
@@ -36,85 +64,300 @@ TARGET_WIDTHS = {
 }
 MAX_WIDTH_ICON = 160 # Retina quality for 40px icon
 
-def optimize_image(source_path, output_name_base, widths):
-    if not os.path.exists(source_path):
+# Encode with the standalone libwebp encoder when available; falls back to Pillow
+CWEBP = shutil.which("cwebp")
+
+# Also try a fast lossless encoding and keep it when smaller. Off by default:
+# lossy wins on every current screenshot.
+TRY_LOSSLESS = "--lossless" in sys.argv[1:]
+
+def output_filename(output_name_base, suffix):
+    # If suffix is 'large', use base name for backward compatibility/simplicity
+    # If suffix is 'small', append -small
+    if suffix == "large":
+        return f"{output_name_base}.webp"
+    return f"{output_name_base}-{suffix}.webp"
+
+def is_up_to_date(source_path, output_paths):
+    # Outputs newer than the source don't need to be decoded and re-encoded
+    source_mtime = source_path.stat().st_mtime
+    return all(
+        path.exists() and path.stat().st_mtime >= source_mtime
+        for path in output_paths
+    )
+
+def encode_webp(img, **options):
+    buffer = io.BytesIO()
+    img.save(buffer, "WEBP", **options)
+    return buffer.getvalue()
+
+def encode_webp_cwebp(img, *option_sets):
+    # Hand the image to cwebp once as an uncompressed PNG. Runs are
+    # sequential and single-threaded since the process pool already keeps
+    # every core busy, and subprocess.run never leaves a child running after
+    # a failure.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = Path(tmp_dir) / "input.png"
+        img.save(input_path, "PNG", compress_level=0)
+        encodings = []
+        for index, options in enumerate(option_sets):
+            output_path = Path(tmp_dir) / f"output-{index}.webp"
+            subprocess.run([CWEBP, "-quiet", *options, input_path, "-o", output_path], check=True)
+            encodings.append(output_path.read_bytes())
+        return encodings
+
+def best_of(*encodings):
+    # Smallest encoding wins
+    return min(encodings, key=len)
+
+def encode_best_webp(img):
+    # method=6 spends the most encoder effort for smaller lossy files. With
+    # --lossless a low-effort lossless encoding is tried as well and kept if
+    # it turns out smaller.
+    if CWEBP:
+        option_sets = [["-q", "80", "-m", "6"]]
+        if TRY_LOSSLESS:
+            option_sets.append(["-lossless", "-z", "1"])
+        return best_of(*encode_webp_cwebp(img, *option_sets))
+
+    option_sets = [{"quality": 80, "method": 6}]
+    if TRY_LOSSLESS:
+        option_sets.append({"lossless": True, "method": 1})
+    return best_of(*(encode_webp(img, **options) for options in option_sets))
+
+def resize(img, width, height):
+    # An exact 2:1 downscale (small from large) is a plain integer box
+    # average, much cheaper than another filter pass. reduce() would round
+    # an odd height up, so the box leaves out the last row to return
+    # exactly the requested size. Other modes (P, 1, I;16) aren't supported
+    # by reduce() and fall through to LANCZOS.
+    if (img.mode in ("L", "LA", "RGB", "RGBA")
+            and img.width == width * 2 and img.height in (height * 2, height * 2 + 1)):
+        return img.reduce(2, box=(0, 0, width * 2, height * 2))
+    # OpenCV doesn't premultiply alpha, so images with real transparency
+    # stay on Pillow to avoid color bleeding from transparent pixels
+    if cv2 is not None and img.mode in ("L", "RGB"):
+        pixels = cv2.resize(np.asarray(img), (width, height), interpolation=cv2.INTER_AREA)
+        return Image.fromarray(pixels)
+    # reducing_gap box-reduces large sources by an integer factor before
+    # the LANCZOS pass
+    return img.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+def describe_decode(img, source_size):
+    # Which decode path Pillow takes for this source, so slow paths are visible
+    if img.format != "JPEG":
+        return f"{img.format} full decode"
+    decoder = "libjpeg-turbo" if features.check_feature("libjpeg_turbo") else "libjpeg"
+    scale = round(source_size[0] / img.width)
+    if scale > 1:
+        return f"JPEG shrink-on-load at 1/{scale} ({decoder})"
+    return f"JPEG full decode ({decoder})"
+
+def drop_opaque_alpha(img):
+    # A fully opaque alpha channel only costs resize bandwidth and a separate
+    # alpha pass in the WebP encoder
+    if img.mode == "RGBA" and img.getextrema()[3] == (255, 255):
+        return img.convert("RGB")
+    return img
+
+def check_pillow_features():
+    # Which native libraries Pillow was built against decides how fast this
+    # script runs, so report them up front
+    webp_version = features.version("webp")
+    if webp_version is None:
+        print(f"❌ Error: Pillow {PIL.__version__} was built without WebP support.")
+        sys.exit(1)
+
+    jpeg_turbo_version = features.version("libjpeg_turbo")
+    if jpeg_turbo_version:
+        jpeg = f"libjpeg-turbo {jpeg_turbo_version}"
+    else:
+        jpeg = f"libjpeg {features.version('jpg')}"
+    print(f"🧩 Pillow {PIL.__version__}, libwebp {webp_version}, {jpeg}")
+
+    if jpeg_turbo_version is None:
+        print("⚠️  Pillow is not linked against libjpeg-turbo; JPEG decoding will be several times slower.")
+
+    # Pillow-SIMD versions carry a ".postN" suffix and resample 2-6x faster
+    if ".post" not in PIL.__version__:
+        print(f"⚠️  Using stock Pillow {PIL.__version__}; install Pillow-SIMD for faster resizing:")
+        print('    pip3 uninstall pillow && CC="cc -mavx2" pip3 install -U --force-reinstall pillow-simd')
+
+def describe_vips_decode(source):
+    # Which loader libvips picked; thumbnail() can shrink JPEG and WebP
+    # sources while decoding
+    loader = source.get("vips-loader")
+    if loader.startswith(("jpegload", "webpload")):
+        return f"libvips {loader}, shrink-on-load"
+    return f"libvips {loader}, full decode"
+
+def optimize_image_vips(source_path, output_name_base, widths):
+    # Header only; pixels are decoded by thumbnail() below
+    source = pyvips.Image.new_from_file(source_path)
+    print(f"🔍 {output_name_base}: {describe_vips_decode(source)}")
+    img = None
+    # Largest first: only the largest variant decodes the source, smaller
+    # ones are resized from the previous variant
+    for suffix, width in sorted(widths.items(), key=lambda item: item[1], reverse=True):
+        if img is None:
+            # Fit to width only (the height bound is effectively unlimited)
+            # and never upscale. The thumbnail streams from the source, so
+            # keep the result in memory for the alpha check and encodes.
+            img = pyvips.Image.thumbnail(source_path, width, height=10_000_000, size="down")
+            # thumbnail() rounds the height to nearest; crop to the
+            # rounded-down height the Pillow path produces
+            if source.width > width:
+                new_height = int(source.height * width / source.width)
+                if img.height > new_height:
+                    img = img.crop(0, 0, img.width, new_height)
+            img = img.copy_memory()
+            if img.hasalpha() and img[img.bands - 1].min() == 255:
+                img = img.extract_band(0, n=img.bands - 1)
+        elif img.width > width:
+            # Explicit vertical scale so heights round down like the Pillow path
+            new_height = int(img.height * width / img.width)
+            scale = width / img.width
+            vscale = new_height / img.height
+            if img.hasalpha():
+                # resize() doesn't premultiply (unlike thumbnail()), which
+                # would bleed color from transparent pixels into the edges
+                img = img.premultiply().resize(scale, vscale=vscale).unpremultiply().cast(img.format)
+            else:
+                img = img.resize(scale, vscale=vscale)
+            img = img.copy_memory()
+
+        final_name = output_filename(output_name_base, suffix)
+        encodings = [img.webpsave_buffer(Q=80, effort=6)]
+        if TRY_LOSSLESS:
+            encodings.append(img.webpsave_buffer(lossless=True, effort=1))
+        (OUTPUT_DIR / final_name).write_bytes(best_of(*encodings))
+        print(f"✅ Generated {final_name} ({img.width}x{img.height})")
+
+def init_worker():
+    # Each pool worker already owns a core, so keep libvips to one thread
+    # instead of a per-worker pool sized to the core count
+    if pyvips is not None:
+        pyvips.concurrency_set(1)
+
+def optimize_image(source_path, output_name_base, widths, force=False):
+    if not source_path.exists():
         print(f"Warning: Source file not found: {source_path}")
         return
 
+    output_paths = [OUTPUT_DIR / output_filename(output_name_base, suffix) for suffix in widths]
+    if not force and is_up_to_date(source_path, output_paths):
+        print(f"⏭️  Skipped {output_name_base} (up to date)")
+        return
+
     try:
+        if pyvips is not None:
+            optimize_image_vips(source_path, output_name_base, widths)
+            return
+
         with Image.open(source_path) as original_img:
-            for suffix, width in widths.items():
-                img = original_img.copy()
-                
-                # Resize if needed
-                if img.width > width:
-                    ratio = width / img.width
-                    new_height = int(img.height * ratio)
-                    img = img.resize((width, new_height), Image.Resampling.LANCZOS)
-                
-                # Construct output filename
-                # If suffix is 'large', use base name for backward compatibility/simplicity
-                # If suffix is 'small', append -small
-                if suffix == "large":
-                    final_name = f"{output_name_base}.webp"
-                else:
-                    final_name = f"{output_name_base}-{suffix}.webp"
-
-                output_path = os.path.join(OUTPUT_DIR, final_name)
-                img.save(output_path, "WEBP", quality=80)
-                print(f"✅ Generated {final_name} ({img.width}x{img.height})")
+            # Let the JPEG decoder shrink on load (1/2, 1/4, 1/8) while keeping
+            # at least 2x the largest target width for the LANCZOS pass.
+            # No-op for PNG sources.
+            source_size = original_img.size
+            draft_width = max(widths.values()) * 2
+            draft_height = int(original_img.height * draft_width / original_img.width)
+            original_img.draft("RGB", (draft_width, draft_height))
+            print(f"🔍 {output_name_base}: {describe_decode(original_img, source_size)}")
+            # Decode up front so encoder threads never race on a lazy load
+            original_img.load()
+
+            # libwebp releases the GIL, so variants encode on threads while
+            # the next (smaller) variant is being resized
+            with ThreadPoolExecutor(max_workers=len(widths)) as executor:
+                encodes = []
+
+                # Largest first, so each smaller variant is resized from the
+                # previous one instead of the full-resolution original
+                img = drop_opaque_alpha(original_img)
+                for suffix, width in sorted(widths.items(), key=lambda item: item[1], reverse=True):
+                    # Resize if needed
+                    if img.width > width:
+                        ratio = width / img.width
+                        new_height = int(img.height * ratio)
+                        img = resize(img, width, new_height)
+
+                    # A variant that needed no resize is the same image object
+                    # as the previous one. Share its encode: concurrent saves
+                    # of one image race on its encoder state.
+                    if not encodes or encodes[-1][0] is not img:
+                        encodes.append((img, [], executor.submit(encode_best_webp, img)))
+                    encodes[-1][1].append(output_filename(output_name_base, suffix))
+
+                for img, final_names, encode in encodes:
+                    data = encode.result()
+                    for final_name in final_names:
+                        (OUTPUT_DIR / final_name).write_bytes(data)
+                        print(f"✅ Generated {final_name} ({img.width}x{img.height})")
             
     except Exception as e:
         print(f"❌ Error processing {source_path}: {e}")
 
-def optimize_icon(source_path, output_name, max_width):
-    if not os.path.exists(source_path):
+def optimize_icon(source_path, output_name, max_width, force=False):
+    if not source_path.exists():
         print(f"Warning: Icon file not found: {source_path}")
         return
+
+    output_path = OUTPUT_DIR / f"{output_name}.webp"
+    if not force and is_up_to_date(source_path, [output_path]):
+        print(f"⏭️  Skipped {output_name} (up to date)")
+        return
         
     try:
         with Image.open(source_path) as img:
+             img = drop_opaque_alpha(img)
              if img.width > max_width:
-                img = img.resize((max_width, max_width), Image.Resampling.LANCZOS)
+                img = resize(img, max_width, max_width)
              
-             output_path = os.path.join(OUTPUT_DIR, f"{output_name}.webp")
-             img.save(output_path, "WEBP", quality=80)
+             output_path.write_bytes(encode_best_webp(img))
              print(f"✅ Generated {output_name}.webp")
     except Exception as e:
         print(f"❌ Error processing icon: {e}")
 
 def main():
+    # Regenerate everything, e.g. after changing encoder settings
+    force = "--force" in sys.argv[1:]
+
     print(f"🚀 Starting image optimization...")
     print(f"📂 Output directory: {OUTPUT_DIR}")
+    # libvips encodes the screenshots itself when available; the icon
+    # always goes through cwebp or Pillow
+    fallback_encoder = CWEBP or "Pillow (install cwebp for faster encoding)"
+    if pyvips:
+        print(f"🔧 WebP encoder: libvips (screenshots), {fallback_encoder} (icon)")
+    else:
+        print(f"🔧 WebP encoder: {fallback_encoder}")
+    if pyvips:
+        print(f"📐 Resizer: libvips {pyvips.version(0)}.{pyvips.version(1)}.{pyvips.version(2)} (screenshots)")
+    else:
+        print(f"📐 Resizer: {'OpenCV ' + cv2.__version__ if cv2 else 'Pillow (install opencv-python for faster resizing)'}")
     
-    if not os.path.exists(OUTPUT_DIR):
-        print("Creating output directory...")
-        os.makedirs(OUTPUT_DIR)
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    # Check for Pillow
-    try:
-        import PIL
-    except ImportError:
-        print("❌ Error: 'Pillow' library is not installed.")
-        print("Please install it running: pip3 install Pillow")
-        sys.exit(1)
+    check_pillow_features()
 
-    # Process Screenshots
-    count = 0
-    for filename, output_name in FILES_TO_PROCESS.items():
-        source = os.path.join(SCREENSHOTS_DIR, filename)
-        optimize_image(source, output_name, TARGET_WIDTHS)
-        count += 1
+    # Process Screenshots in parallel, one worker per core
+    jobs = [
+        (SCREENSHOTS_DIR / filename, output_name, TARGET_WIDTHS, force)
+        for filename, output_name in FILES_TO_PROCESS.items()
+    ]
+    with Pool(processes=os.cpu_count(), initializer=init_worker) as pool:
+        pool.starmap(optimize_image, jobs)
+    count = len(jobs)
 
     # Process Icon
-    optimize_icon(ICON_PATH, "app-icon", MAX_WIDTH_ICON)
+    optimize_icon(ICON_PATH, "app-icon", MAX_WIDTH_ICON, force)
     count += 1
     
     print(f"✨ Done! Processed {count} source images.")
 
 if __name__ == "__main__":
     # Ensure we are running from project root if possible
-    if not os.path.isdir("docs") or not os.path.isdir("ShortcutCycle"):
+    if not Path("docs").is_dir() or not Path("ShortcutCycle").is_dir():
         print("⚠️  Warning: It looks like you aren't running this from the project root.")
     
     main()